@@ -1,31 +1,159 @@
 import json
 import boto3 # type: ignore
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from botocore.exceptions import ClientError # type: ignore
+from botocore.config import Config # type: ignore
+from botocore.exceptions import BotoCoreError, ClientError # type: ignore
+from functools import lru_cache
+from bisect import bisect_left
+from itertools import groupby, islice
+from operator import itemgetter
+import threading
+import time
 import logging
 import hashlib
+import gzip
+import io
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 import os
+import re
+
+try:
+    import orjson # type: ignore
+except ImportError:
+    # Not part of the Lambda runtime, only used when bundled into sources/
+    orjson = None
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# Collector calls wait on AWS API latency rather than CPU, so size the pool well past the core count
+MAX_WORKERS = max(64, (os.cpu_count() or 1) * 8)
 # Email configuration from environment variables
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'your-sender@example.com')
 RECIPIENT_EMAILS = os.environ.get('RECIPIENT_EMAILS', '').split(',')
 AWS_REGION_SES = os.environ.get('AWS_REGION_SES', 'ap-southeast-2')
 BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'aws-cost-reporter-state')
+SES_TEMPLATE_NAME = os.environ.get('SES_TEMPLATE_NAME', 'aws-cost-reporter-report')
+
+# Cost Explorer service name fragments and the regional collector each one enables
+SERVICE_COLLECTORS = (
+    ('Elastic Compute Cloud', 'ec2'),
+    ('EC2', 'ec2'),
+    ('Relational Database Service', 'rds'),
+    ('RDS', 'rds'),
+    ('Elastic Block Store', 'ebs'),
+    ('EBS', 'ebs'),
+    ('Elastic Load Balancing', 'elb'),
+    ('ELB', 'elb'),
+    ('Virtual Private Cloud', 'vpc'),
+    ('VPC', 'vpc'),
+    ('ElastiCache', 'elasticache'),
+    ('Redshift', 'redshift'),
+    ('Lambda', 'lambda')
+)
+
+# The per-region query only decides where to look for resources, so credits and refunds
+# are left out of it and a region with usage is scanned even when credits cover it
+CE_EXCLUDE_CREDITS_FILTER = {
+    'Not': {
+        'Dimensions': {
+            'Key': 'RECORD_TYPE',
+            'Values': ['Credit', 'Refund']
+        }
+    }
+}
+
+# SES limits for send_bulk_templated_email
+SES_MAX_BULK_DESTINATIONS = 50
+SES_MAX_TEMPLATE_DATA = 262144
+# Larger HTML bodies are sent as raw MIME with the full JSON report attached
+SES_MAX_INLINE_HTML = 1024 * 1024
+# Errors a regional collector expects in regions or services the account can't use; skipped without logging.
+# Anything other than a ClientError is left to the fan-out in get_all_charged_resources to log
+SKIPPED_REGION_ERROR_CODES = frozenset({'UnauthorizedOperation', 'OptInRequired', 'AuthFailure'})
+# WAFv2 scopes listed from us-east-1; CLOUDFRONT is only available there
+WAF_SCOPES = ('REGIONAL', 'CLOUDFRONT')
+
+# Built once per container so warm invocations reuse the same session and clients
+SESSION = boto3.Session()
+# One pool slot per worker thread, keep-alive to reuse TLS connections, adaptive retries for throttling.
+# Short timeouts make a hung endpoint fail over to a retry quickly; a single call can still take about
+# two minutes across all attempts, which the 15 minute Lambda timeout leaves room for
+BOTO_CFG = Config(
+    max_pool_connections=MAX_WORKERS,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 6},
+    connect_timeout=3,
+    read_timeout=20
+)
+# (service, region) -> client, shared by every worker thread and warm invocation
+_CLIENTS = {}
+_CLIENT_LOCK = threading.Lock()
+
+def _client(service, region=None):
+    """Get a cached boto3 client for a (service, region) pair"""
+    key = (service, region)
+    client = _CLIENTS.get(key)
+    if client is None:
+        # Session.client() is not thread-safe, and clients are built from worker threads.
+        # Re-check under the lock so concurrent misses build one client, not one each
+        with _CLIENT_LOCK:
+            client = _CLIENTS.get(key)
+            if client is None:
+                client = SESSION.client(service, region_name=region, config=BOTO_CFG)
+                _CLIENTS[key] = client
+    return client
+
+# Slow-changing listings reused across warm invocations: key -> (fetched at, value)
+_CACHE = {}
+
+def cached(key, ttl, fn):
+    """Return fn() from the module cache if it was fetched less than ttl seconds ago"""
+    now = time.monotonic()
+    entry = _CACHE.get(key)
+    if entry is not None and now - entry[0] < ttl:
+        return entry[1]
+    # fn() raising leaves the cache untouched, so errors are retried on the next call
+    value = fn()
+    _CACHE[key] = (now, value)
+    return value
+
+# Clients used on every invocation are built during Lambda init; regional ones stay lazy
+S3 = _client('s3')
+CE = _client('ce')
+SES = _client('ses', AWS_REGION_SES)
+
+def dumps_report_json(data):
+    """Serialize report data as indented JSON, using orjson when it is available"""
+    if orjson is not None:
+        # Pass datetimes through to default=str so the output matches the json module
+        option = orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATETIME
+        return orjson.dumps(data, option=option, default=str).decode('utf-8')
+    return json.dumps(data, indent=2, default=str)
+
+def add_json_field(report_json, key, value):
+    """Add a top-level field to a non-empty indented JSON object without re-serializing it"""
+    head = report_json[:report_json.rindex('}')].rstrip()
+    if head.endswith('{'):
+        raise ValueError("add_json_field needs a non-empty JSON object")
+    return f'{head},\n  {json.dumps(key)}: {json.dumps(value)}\n}}'
 
 def lambda_handler(event, context):
     """
     Lambda function to list all charged AWS resources across all regions
     """
     try:
+        # Capture the time once so the execution ID, report and records all agree
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        
         # Create execution ID for idempotency
-        execution_date = datetime.now().strftime("%Y-%m-%d")
+        execution_date = now.strftime("%Y-%m-%d")
         execution_id = f"cost-report-{execution_date}"
         
         logger.info(f"Starting cost report execution: {execution_id}")
@@ -37,12 +165,12 @@ def lambda_handler(event, context):
                 'body': json.dumps({
                     'message': 'Report already sent today',
                     'execution_id': execution_id,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': now_iso
                 })
             }
         # Initialize the response structure
         charged_resources = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now_iso,
             'execution_id': execution_id,
             'total_cost': 0.0,
             'resources_by_service': {},
@@ -56,11 +184,9 @@ def lambda_handler(event, context):
             }
         }
         
-        start_time = datetime.now()
-        
         # Get cost data from Cost Explorer with detailed breakdown
         logger.info("Fetching cost data from Cost Explorer")
-        cost_data = get_detailed_cost_explorer_data()
+        cost_data = get_detailed_cost_explorer_data(now)
         charged_resources['total_cost'] = cost_data['total_cost']
         charged_resources['resources_by_service'] = cost_data['by_service']
         charged_resources['detailed_cost_breakdown'] = cost_data['detailed_breakdown']
@@ -68,21 +194,24 @@ def lambda_handler(event, context):
         # Get detailed resource information for services with charges
         charged_services = set(cost_data['by_service'].keys())
         logger.info(f"Found {len(charged_services)} services with charges: {list(charged_services)}")
+        region_service_index = {}
 
         if charged_services:
             # Get resources in parallel
-            region_resources, global_resources = get_all_charged_resources(charged_services)
+            region_resources, global_resources = get_all_charged_resources(
+                charged_services, cost_data['tags'], cost_data['tags_by_region']
+            )
             
             charged_resources['resources_by_region'] = region_resources
             charged_resources['detailed_resources'].extend(global_resources)
             
-            # Flatten all region resources
+            # Flatten all region resources, grouping each region by service for the email
             for region, resources in region_resources.items():
                 charged_resources['detailed_resources'].extend(resources)
+                region_service_index[region] = group_resources_by_service(resources)
         
         # Calculate processing stats
-        end_time = datetime.now()
-        processing_time = (end_time - start_time).total_seconds()
+        processing_time = (datetime.now(timezone.utc) - now).total_seconds()
         charged_resources['processing_stats'] = {
             'regions_checked': len(charged_resources['resources_by_region']),
             'resources_found': len(charged_resources['detailed_resources']),
@@ -91,16 +220,21 @@ def lambda_handler(event, context):
         
         logger.info(f"Processing completed in {processing_time:.2f} seconds")
         
-        # Mark as processed BEFORE sending email to prevent duplicates
-        mark_as_processed(execution_id, charged_resources)
-
-        # Send email report
-        email_sent = send_email_report(charged_resources)
+        # Serialize the report once, it is reused for the S3 copy, the email attachment and the response body
+        report_json = dumps_report_json(charged_resources)
+        
+        # Mark as processed while the email is sent; both are I/O bound and independent
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            mark_future = executor.submit(mark_as_processed, execution_id, charged_resources, report_json, now_iso)
+            email_future = executor.submit(send_email_report, charged_resources, region_service_index, report_json, now)
+            email_sent = email_future.result()
+            # Wait for the execution record so a retried invocation sees it
+            mark_future.result()
         charged_resources['email_sent'] = email_sent
         logger.info(f"Cost report completed successfully. Email sent: {email_sent}")
         return {
             'statusCode': 200,
-            'body': json.dumps(charged_resources, indent=2, default=str)
+            'body': add_json_field(report_json, 'email_sent', email_sent)
         }
         
     except Exception as e:
@@ -116,8 +250,7 @@ def lambda_handler(event, context):
 def already_processed_today(execution_id):
     """Check if the report has already been processed today"""
     try:
-        s3 = boto3.client('s3')
-        s3.head_object(Bucket=BUCKET_NAME, Key=f"executions/{execution_id}.json")
+        S3.head_object(Bucket=BUCKET_NAME, Key=f"executions/{execution_id}.json")
         logger.info(f"Found existing execution record: {execution_id}")
         return True
     except ClientError as e:
@@ -131,35 +264,47 @@ def already_processed_today(execution_id):
         logger.warning(f"Unexpected error checking execution record: {str(e)}")
         return False
 
-def mark_as_processed(execution_id, report_data):
-    """Mark the execution as processed"""
+def mark_as_processed(execution_id, report_data, report_json=None, processed_at=None):
+    """
+    Mark the execution as processed.
+    report_json is report_data already serialized with dumps_report_json, if available.
+    processed_at is the invocation's ISO timestamp, defaulting to the current UTC time.
+    """
     try:
-        s3 = boto3.client('s3')
-        
         # Create a summary for storage
         summary = {
             'execution_id': execution_id,
-            'processed_at': datetime.utcnow().isoformat(),
+            'processed_at': processed_at or datetime.now(timezone.utc).isoformat(),
             'total_cost': report_data.get('total_cost', 0),
             'resources_count': len(report_data.get('detailed_resources', [])),
             'processing_stats': report_data.get('processing_stats', {})
         }
         
-        # Store execution record
-        s3.put_object(
-            Bucket=BUCKET_NAME,
-            Key=f"executions/{execution_id}.json",
-            Body=json.dumps(summary, indent=2, default=str),
-            ContentType='application/json'
-        )
-        
-        # Store full report
-        s3.put_object(
-            Bucket=BUCKET_NAME,
-            Key=f"reports/{execution_id}-full-report.json",
-            Body=json.dumps(report_data, indent=2, default=str),
-            ContentType='application/json'
-        )
+        if report_json is None:
+            report_json = dumps_report_json(report_data)
+        
+        # Store execution record and full report concurrently, they are independent
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(
+                    S3.put_object,
+                    Bucket=BUCKET_NAME,
+                    Key=f"executions/{execution_id}.json",
+                    Body=dumps_report_json(summary),
+                    ContentType='application/json'
+                ),
+                # The full report is large and repetitive, so store it gzip-compressed
+                executor.submit(
+                    S3.put_object,
+                    Bucket=BUCKET_NAME,
+                    Key=f"reports/{execution_id}-full-report.json",
+                    Body=gzip.compress(report_json.encode('utf-8'), compresslevel=1),
+                    ContentType='application/json',
+                    ContentEncoding='gzip'
+                )
+            ]
+            for future in futures:
+                future.result()
         
         logger.info(f"Marked execution as processed: {execution_id}")
         
@@ -167,33 +312,74 @@ def mark_as_processed(execution_id, report_data):
         logger.error(f"Failed to mark execution as processed: {str(e)}")
         # Don't raise exception here to avoid breaking the main flow
 
-def get_all_charged_resources(charged_services):
-    """Get all charged resources across regions in parallel"""
+@lru_cache(maxsize=None)
+def get_service_collectors(service):
+    """Map a Cost Explorer service name to the regional collector tags it enables"""
+    return frozenset(tag for fragment, tag in SERVICE_COLLECTORS if fragment in service)
+
+@lru_cache(maxsize=1)
+def get_enabled_regions():
+    """Get the regions enabled for this account, cached for the container lifetime"""
+    ec2_client = _client('ec2', 'us-east-1')
+    response = ec2_client.describe_regions(AllRegions=False)
+    return tuple(region['RegionName'] for region in response['Regions'])
+
+def get_all_charged_resources(charged_services, needed, tags_by_region=None):
+    """
+    Get all charged resources across regions in parallel.
+    tags_by_region limits each region to the collectors for services billed there;
+    when it is None every needed collector runs in every region.
+    """
     try:
         # Get all available regions
-        ec2_client = boto3.client('ec2', region_name='us-east-1')
-        regions = [region['RegionName'] for region in ec2_client.describe_regions()['Regions']]
+        regions = get_enabled_regions()
         
         region_resources = {}
-        
-        # Process regions in parallel
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            # Submit all region tasks
-            future_to_region = {
-                executor.submit(get_charged_resources_in_region, region, charged_services): region
-                for region in regions
+        region_collectors = {}
+        for region in regions:
+            region_needed = needed if tags_by_region is None else needed & tags_by_region.get(region, frozenset())
+            # Skip regions with no charges for any collected service
+            if region_needed:
+                region_collectors[region] = get_region_collectors(region_needed)
+        
+        # Build every client up front so workers only wait on API calls
+        for region, collectors in region_collectors.items():
+            for _, services in collectors:
+                for service in services:
+                    _client(service, region)
+        
+        # Run every (collector, region) pair in parallel
+        tasks = [
+            (region, index, collector)
+            for region, collectors in region_collectors.items()
+            for index, (collector, _) in enumerate(collectors)
+        ]
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(tasks)))) as executor:
+            # Submit all tasks
+            future_to_task = {
+                executor.submit(collector, region): (region, index)
+                for region, index, collector in tasks
             }
             
             # Collect results
-            for future in as_completed(future_to_region):
-                region = future_to_region[future]
+            for future in as_completed(future_to_task):
+                region, index = future_to_task[future]
                 try:
-                    resources = future.result(timeout=30)  # 30 second timeout per region
-                    if resources:
-                        region_resources[region] = resources
-                        logger.info(f"Found {len(resources)} resources in {region}")
+                    results[(region, index)] = future.result()
                 except Exception as e:
-                    logger.warning(f"Error processing region {region}: {str(e)}")
+                    logger.warning(f"Error running {region_collectors[region][index][0].__name__} in {region}: {str(e)}")
+        
+        # Reassemble each region's resources in collector order
+        for region, collectors in region_collectors.items():
+            resources = [
+                resource
+                for index in range(len(collectors))
+                for resource in results.get((region, index), [])
+            ]
+            if resources:
+                region_resources[region] = resources
+                logger.info(f"Found {len(resources)} resources in {region}")
         
         # Get global resources
         global_resources = get_global_charged_resources(charged_services)
@@ -206,40 +392,85 @@ def get_all_charged_resources(charged_services):
         logger.error(f"Error getting charged resources: {str(e)}")
         return {}, []
 
-def get_detailed_cost_explorer_data():
+def paginate_cost_and_usage(ce_client, **kwargs):
     """
-    Get detailed cost data from AWS Cost Explorer for the current month only
+    Yield every page of a get_cost_and_usage query.
+    Cost Explorer has no paginator for this operation, so follow NextPageToken by hand.
+    """
+    while True:
+        page = ce_client.get_cost_and_usage(**kwargs)
+        yield page
+        next_token = page.get('NextPageToken')
+        if not next_token:
+            return
+        kwargs['NextPageToken'] = next_token
+
+def get_collector_tags_by_region(time_period):
+    """
+    Map each region to the collector tags of the services billed in it.
+    Returns None when the lookup fails, so callers fall back to scanning every region.
     """
     try:
-        ce_client = boto3.client('ce')
-        
-        # Get date range (last 30 days)
-        today = datetime.now().date()
-        start_date = today.replace(day=1)  # First day of current month
-        end_date = today
-        
-        # Get cost by service first
-        service_response = ce_client.get_cost_and_usage(
-            TimePeriod={
-                'Start': start_date.strftime('%Y-%m-%d'),
-                'End': end_date.strftime('%Y-%m-%d')
-            },
+        region_pages = paginate_cost_and_usage(
+            CE,
+            TimePeriod=time_period,
             Granularity='MONTHLY',
             Metrics=['BlendedCost'],
+            Filter=CE_EXCLUDE_CREDITS_FILTER,
             GroupBy=[
                 {
                     'Type': 'DIMENSION',
                     'Key': 'SERVICE'
+                },
+                {
+                    'Type': 'DIMENSION',
+                    'Key': 'REGION'
                 }
             ]
         )
         
+        region_service_costs = defaultdict(float)
+        for page in region_pages:
+            for result in page['ResultsByTime']:
+                for group in result['Groups']:
+                    service, region = group['Keys']
+                    region_service_costs[(region, service)] += float(group['Metrics']['BlendedCost']['Amount'])
+        
+        tags_by_region = defaultdict(set)
+        for (region, service), cost in region_service_costs.items():
+            if cost > 0:
+                tags_by_region[region].update(get_service_collectors(service))
+        
+        return {region: frozenset(tags) for region, tags in tags_by_region.items()}
+    
+    except Exception as e:
+        logger.error(f"Error getting cost explorer data by region: {str(e)}")
+        return None
+
+def get_detailed_cost_explorer_data(now=None):
+    """
+    Get detailed cost data from AWS Cost Explorer for the current month only.
+    now is the invocation time, so the period matches the execution date.
+    """
+    try:
+        # Get date range (last 30 days)
+        today = (now or datetime.now(timezone.utc)).date()
+        start_date = today.replace(day=1)  # First day of current month
+        end_date = today
+        time_period = {
+            'Start': start_date.strftime('%Y-%m-%d'),
+            'End': end_date.strftime('%Y-%m-%d')
+        }
+        
+        # The per-region query runs while the detailed breakdown below is paged through
+        region_executor = ThreadPoolExecutor(max_workers=1)
+        tags_by_region_future = region_executor.submit(get_collector_tags_by_region, time_period)
+        region_executor.shutdown(wait=False)
+        
         # Get detailed breakdown by service and usage type WITH USAGE QUANTITY
-        detailed_response = ce_client.get_cost_and_usage(
-            TimePeriod={
-                'Start': start_date.strftime('%Y-%m-%d'),
-                'End': end_date.strftime('%Y-%m-%d')
-            },
+        detailed_pages = paginate_cost_and_usage(
+            CE,
+            TimePeriod=time_period,
             Granularity='MONTHLY',
             Metrics=['BlendedCost', 'UsageQuantity'], # Add UsageQuantity metric
             GroupBy=[
@@ -254,52 +485,57 @@ def get_detailed_cost_explorer_data():
             ]
         )
         
-        cost_by_service = {}
+        service_totals = defaultdict(float)
         detailed_breakdown = defaultdict(dict)
-        total_cost = 0.0
+        
+        # Process detailed breakdown, accumulating service totals in the same pass
+        for page in detailed_pages:
+            for result in page['ResultsByTime']:
+                for group in result['Groups']:
+                    service = group['Keys'][0]
+                    usage_type = group['Keys'][1]
+                    cost = float(group['Metrics']['BlendedCost']['Amount'])
+                    usage_quantity = float(group['Metrics']['UsageQuantity']['Amount'])
+                    
+                    # Net cost per service, credits and refunds included
+                    service_totals[service] += cost
+                    
+                    if cost > 0:
+                        # Clean up usage type names for better readability
+                        clean_usage_type = clean_usage_type_name(usage_type, service)
+                        detailed_breakdown[service][clean_usage_type] = {
+                            'cost': cost,
+                            'usage_quantity': usage_quantity,
+                            'usage_type_raw': usage_type,
+                            'rate_per_unit': cost / usage_quantity if usage_quantity > 0 else 0
+                        }
         
         # Process service-level costs
-        for result in service_response['ResultsByTime']:
-            for group in result['Groups']:
-                service = group['Keys'][0]
-                cost = float(group['Metrics']['BlendedCost']['Amount'])
-                if cost > 0:
-                    cost_by_service[service] = cost
-                    total_cost += cost
+        cost_by_service = {service: cost for service, cost in service_totals.items() if cost > 0}
+        total_cost = sum(cost_by_service.values())
         
-        # Process detailed breakdown
-        for result in detailed_response['ResultsByTime']:
-            for group in result['Groups']:
-                service = group['Keys'][0]
-                usage_type = group['Keys'][1]
-                cost = float(group['Metrics']['BlendedCost']['Amount'])
-                usage_quantity = float(group['Metrics']['UsageQuantity']['Amount'])
-                
-                if cost > 0:
-                    # Clean up usage type names for better readability
-                    clean_usage_type = clean_usage_type_name(usage_type, service)
-                    detailed_breakdown[service][clean_usage_type] = {
-                        'cost': cost,
-                        'usage_quantity': usage_quantity,
-                        'usage_type_raw': usage_type,
-                        'rate_per_unit': cost / usage_quantity if usage_quantity > 0 else 0
-                    }
+        # Collector tags for the charged services, so callers never re-scan service names
+        tags = frozenset().union(*(get_service_collectors(service) for service in cost_by_service))
         
         return {
             'total_cost': round(total_cost, 2),
             'by_service': cost_by_service,
-            'detailed_breakdown': dict(detailed_breakdown)
+            'detailed_breakdown': dict(detailed_breakdown),
+            'tags': tags,
+            'tags_by_region': tags_by_region_future.result()
         }
         
     except Exception as e:
         logger.error(f"Error getting cost explorer data: {str(e)}")
-        return {'total_cost': 0.0, 'by_service': {}, 'detailed_breakdown': {}}
+        return {'total_cost': 0.0, 'by_service': {}, 'detailed_breakdown': {}, 'tags': frozenset(), 'tags_by_region': None}
 
+@lru_cache(maxsize=4096)
 def get_usage_unit_for_type(usage_type, service):
     """
     Determine the appropriate unit for usage quantity based on usage type and service
     """
     usage_type_lower = usage_type.lower()
+    service_lower = service.lower()
     
     # NAT Gateway
     if 'natgateway' in usage_type_lower:
@@ -327,15 +563,15 @@ def get_usage_unit_for_type(usage_type, service):
         return 'GB-Mo'
     
     # S3
-    elif 'storageusage' in usage_type_lower and 's3' in service.lower():
+    elif 'storageusage' in usage_type_lower and 's3' in service_lower:
         return 'GB-Mo'
-    elif 'request' in usage_type_lower and 's3' in service.lower():
+    elif 'request' in usage_type_lower and 's3' in service_lower:
         return 'Requests'
     
     # Lambda
-    elif 'request' in usage_type_lower and 'lambda' in service.lower():
+    elif 'request' in usage_type_lower and 'lambda' in service_lower:
         return 'Requests'
-    elif 'duration' in usage_type_lower and 'lambda' in service.lower():
+    elif 'duration' in usage_type_lower and 'lambda' in service_lower:
         return 'GB-Seconds'
     
     # Data Transfer
@@ -347,152 +583,166 @@ def get_usage_unit_for_type(usage_type, service):
         return 'Hrs'
     
     # CloudFront
-    elif 'datatransfer' in usage_type_lower and 'cloudfront' in service.lower():
+    elif 'datatransfer' in usage_type_lower and 'cloudfront' in service_lower:
         return 'GB'
-    elif 'request' in usage_type_lower and 'cloudfront' in service.lower():
+    elif 'request' in usage_type_lower and 'cloudfront' in service_lower:
         return 'Requests'
     
     # Default
     return 'Units'
 
+def _instance_label(name):
+    """Build a label function that appends the instance type after the colon, if any"""
+    def label(cleaned):
+        parts = cleaned.split(':')
+        if len(parts) > 1:
+            return f"{name} - {parts[1]}"
+        return f"{name} Hours"
+    return label
+
+def _ebs_label(cleaned):
+    """Label EBS usage types, keeping the raw name for unknown EBS usage"""
+    for pattern, label in EBS_USAGE_LABELS:
+        if pattern in cleaned:
+            return label
+    return cleaned
+
+# Region prefixes stripped from usage types, e.g. USE1-BoxUsage:t3.micro
+USAGE_TYPE_REGION_PREFIX = re.compile(r'^(?:USE1|USE2|USW1|USW2|EUW1|EUW2|EUW3|APS1|APS2|APN1|APN2|SAE1|CAN1|EUC1)-')
+
+# Cost Explorer service name fragments mapped to a short tag, first match wins
+USAGE_TYPE_SERVICE_TAGS = (
+    (('Amazon Virtual Private Cloud', 'VPC'), 'vpc'),
+    (('Amazon Elastic Compute Cloud', 'EC2'), 'ec2'),
+    (('Amazon Relational Database Service',), 'rds'),
+    (('Amazon Simple Storage Service', 'S3'), 's3'),
+    (('AWS Lambda',), 'lambda'),
+    (('Amazon ElastiCache',), 'elasticache'),
+    (('Amazon CloudFront',), 'cloudfront')
+)
+
+EBS_USAGE_LABELS = (
+    ('VolumeUsage', 'EBS Volume Storage'),
+    ('SnapshotUsage', 'EBS Snapshot Storage'),
+    ('IOPS', 'EBS Provisioned IOPS')
+)
+
+# Per-service (substring, label) rules, first match wins. A label may be a
+# function of the cleaned usage type when the name has to be derived from it.
+USAGE_TYPE_LABELS = {
+    'vpc': (
+        ('NatGateway', 'NAT Gateway Hours'),
+        ('PublicIP', 'Elastic IP Addresses'),
+        ('VpcEndpoint', 'VPC Endpoints'),
+        ('VPN', 'VPN Connection Hours')
+    ),
+    'ec2': (
+        ('BoxUsage', _instance_label('EC2 Instance')),
+        ('EBS', _ebs_label),
+        ('DataTransfer', 'Data Transfer'),
+        ('LoadBalancer', 'Load Balancer Hours')
+    ),
+    'rds': (
+        ('InstanceUsage', _instance_label('RDS Instance')),
+        ('StorageUsage', 'RDS Storage'),
+        ('BackupUsage', 'RDS Backup Storage'),
+        ('IOPS', 'RDS Provisioned IOPS')
+    ),
+    's3': (
+        ('StorageUsage', 'S3 Storage'),
+        ('Requests', 'S3 Requests'),
+        ('DataTransfer', 'S3 Data Transfer')
+    ),
+    'lambda': (
+        ('Request', 'Lambda Requests'),
+        ('Duration', 'Lambda Duration')
+    ),
+    'elasticache': (
+        ('NodeUsage', 'ElastiCache Node Hours'),
+        ('BackupUsage', 'ElastiCache Backup Storage')
+    ),
+    'cloudfront': (
+        ('DataTransfer', 'CloudFront Data Transfer'),
+        ('Request', 'CloudFront Requests')
+    )
+}
+
+@lru_cache(maxsize=None)
+def _usage_type_service_tag(service):
+    """Get the USAGE_TYPE_LABELS key for a Cost Explorer service name"""
+    for fragments, tag in USAGE_TYPE_SERVICE_TAGS:
+        if any(fragment in service for fragment in fragments):
+            return tag
+    return None
+
 def clean_usage_type_name(usage_type, service):
     """
     Clean up usage type names to make them more readable
     """
     # Remove region prefixes
-    cleaned = usage_type
+    cleaned = USAGE_TYPE_REGION_PREFIX.sub('', usage_type, count=1)
     
-    # Common patterns to clean up
-    region_prefixes = ['USE1-', 'USE2-', 'USW1-', 'USW2-', 'EUW1-', 'EUW2-', 'EUW3-', 
-                      'APS1-', 'APS2-', 'APN1-', 'APN2-', 'SAE1-', 'CAN1-', 'EUC1-']
+    # Service-specific cleaning
+    tag = _usage_type_service_tag(service)
+    for pattern, label in USAGE_TYPE_LABELS.get(tag, ()):
+        if pattern in cleaned:
+            return label(cleaned) if callable(label) else label
     
-    for prefix in region_prefixes:
-        if cleaned.startswith(prefix):
-            cleaned = cleaned[len(prefix):]
-            break
+    # Return original if no specific pattern matched
+    return cleaned
+
+def get_region_collectors(needed):
+    """
+    List the regional collectors to run for the needed collector tags, in report order.
+    Each entry is (collector function, boto3 services the collector calls).
+    needed is the set of collector tags from get_detailed_cost_explorer_data().
     
-    # Service-specific cleaning
-    if 'Amazon Virtual Private Cloud' in service or 'VPC' in service:
-        if 'NatGateway' in cleaned:
-            return 'NAT Gateway Hours'
-        elif 'PublicIP' in cleaned:
-            return 'Elastic IP Addresses'
-        elif 'VpcEndpoint' in cleaned:
-            return 'VPC Endpoints'
-        elif 'VPN' in cleaned:
-            return 'VPN Connection Hours'
+    The per-service describe calls are deliberate: the Resource Groups Tagging API
+    only returns resources that have been tagged, and none of the state, size or
+    type attributes shown in the report.
+    """
+    collectors = []
     
-    elif 'Amazon Elastic Compute Cloud' in service or 'EC2' in service:
-        if 'BoxUsage' in cleaned:
-            # Extract instance type
-            parts = cleaned.split(':')
-            if len(parts) > 1:
-                return f"EC2 Instance - {parts[1]}"
-            return 'EC2 Instance Hours'
-        elif 'EBS' in cleaned:
-            if 'VolumeUsage' in cleaned:
-                return 'EBS Volume Storage'
-            elif 'SnapshotUsage' in cleaned:
-                return 'EBS Snapshot Storage'
-            elif 'IOPS' in cleaned:
-                return 'EBS Provisioned IOPS'
-        elif 'DataTransfer' in cleaned:
-            return 'Data Transfer'
-        elif 'LoadBalancer' in cleaned:
-            return 'Load Balancer Hours'
+    # EC2 Instances
+    if 'ec2' in needed:
+        collectors.append((get_ec2_instances, ('ec2',)))
     
-    elif 'Amazon Relational Database Service' in service:
-        if 'InstanceUsage' in cleaned:
-            parts = cleaned.split(':')
-            if len(parts) > 1:
-                return f"RDS Instance - {parts[1]}"
-            return 'RDS Instance Hours'
-        elif 'StorageUsage' in cleaned:
-            return 'RDS Storage'
-        elif 'BackupUsage' in cleaned:
-            return 'RDS Backup Storage'
-        elif 'IOPS' in cleaned:
-            return 'RDS Provisioned IOPS'
+    # RDS Instances
+    if 'rds' in needed:
+        collectors.append((get_rds_instances, ('rds',)))
     
-    elif 'Amazon Simple Storage Service' in service or 'S3' in service:
-        if 'StorageUsage' in cleaned:
-            return 'S3 Storage'
-        elif 'Requests' in cleaned:
-            return 'S3 Requests'
-        elif 'DataTransfer' in cleaned:
-            return 'S3 Data Transfer'
+    # EBS Volumes
+    if 'ebs' in needed:
+        collectors.append((get_ebs_volumes, ('ec2',)))
     
-    elif 'AWS Lambda' in service:
-        if 'Request' in cleaned:
-            return 'Lambda Requests'
-        elif 'Duration' in cleaned:
-            return 'Lambda Duration'
+    # Load Balancers
+    if 'elb' in needed:
+        collectors.append((get_load_balancers, ('elbv2', 'elb')))
     
-    elif 'Amazon ElastiCache' in service:
-        if 'NodeUsage' in cleaned:
-            return 'ElastiCache Node Hours'
-        elif 'BackupUsage' in cleaned:
-            return 'ElastiCache Backup Storage'
+    # NAT Gateways and VPC resources
+    if 'vpc' in needed:
+        collectors.append((get_nat_gateways, ('ec2',)))
+        collectors.append((get_elastic_ips, ('ec2',)))
+        collectors.append((get_vpc_endpoints, ('ec2',)))
     
-    elif 'Amazon CloudFront' in service:
-        if 'DataTransfer' in cleaned:
-            return 'CloudFront Data Transfer'
-        elif 'Request' in cleaned:
-            return 'CloudFront Requests'
+    # ElastiCache
+    if 'elasticache' in needed:
+        collectors.append((get_elasticache_clusters, ('elasticache',)))
     
-    # Return original if no specific pattern matched
-    return cleaned
-
-def get_charged_resources_in_region(region, charged_services):
-    """
-    Get charged resources in a specific region
-    """
-    resources = []
+    # Redshift
+    if 'redshift' in needed:
+        collectors.append((get_redshift_clusters, ('redshift',)))
     
-    try:
-        # EC2 Instances
-        if any('Elastic Compute Cloud' in service or 'EC2' in service for service in charged_services):
-            resources.extend(get_ec2_instances(region))
-        
-        # RDS Instances
-        if any('Relational Database Service' in service or 'RDS' in service for service in charged_services):
-            resources.extend(get_rds_instances(region))
-        
-        # EBS Volumes
-        if any('Elastic Block Store' in service or 'EBS' in service for service in charged_services):
-            resources.extend(get_ebs_volumes(region))
-        
-        # Load Balancers
-        if any('Elastic Load Balancing' in service or 'ELB' in service for service in charged_services):
-            resources.extend(get_load_balancers(region))
-        
-        # NAT Gateways and VPC resources
-        if any('Virtual Private Cloud' in service or 'VPC' in service for service in charged_services):
-            resources.extend(get_nat_gateways(region))
-            resources.extend(get_elastic_ips(region))
-            resources.extend(get_vpc_endpoints(region))
-        
-        # ElastiCache
-        if any('ElastiCache' in service for service in charged_services):
-            resources.extend(get_elasticache_clusters(region))
-        
-        # Redshift
-        if any('Redshift' in service for service in charged_services):
-            resources.extend(get_redshift_clusters(region))
-        
-        # Lambda
-        if any('Lambda' in service for service in charged_services):
-            resources.extend(get_lambda_functions(region))
-        
-    except Exception as e:
-        logger.error(f"Error getting resources in region {region}: {str(e)}")
+    # Lambda
+    if 'lambda' in needed:
+        collectors.append((get_lambda_functions, ('lambda',)))
     
-    return resources
+    return collectors
 
 def get_elastic_ips(region):
     """Get Elastic IP addresses"""
     try:
-        ec2 = boto3.client('ec2', region_name=region)
+        ec2 = _client('ec2', region)
         response = ec2.describe_addresses()
         
         eips = []
@@ -508,55 +758,185 @@ def get_elastic_ips(region):
             })
         
         return eips
-    except Exception as e:
-        logger.error(f"Error getting Elastic IPs in {region}: {str(e)}")
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting Elastic IPs in {region}: {str(e)}")
         return []
 
 def get_vpc_endpoints(region):
     """Get VPC Endpoints"""
     try:
-        ec2 = boto3.client('ec2', region_name=region)
-        response = ec2.describe_vpc_endpoints()
+        ec2 = _client('ec2', region)
+        paginator = ec2.get_paginator('describe_vpc_endpoints')
         
         endpoints = []
-        for endpoint in response['VpcEndpoints']:
-            endpoints.append({
-                'service': 'VPC',
-                'resource_type': 'VPC Endpoint',
-                'resource_id': endpoint['VpcEndpointId'],
-                'region': region,
-                'state': endpoint['State'],
-                'service_name': endpoint['ServiceName'],
-                'vpc_id': endpoint['VpcId']
-            })
+        for page in paginator.paginate():
+            for endpoint in page['VpcEndpoints']:
+                endpoints.append({
+                    'service': 'VPC',
+                    'resource_type': 'VPC Endpoint',
+                    'resource_id': endpoint['VpcEndpointId'],
+                    'region': region,
+                    'state': endpoint['State'],
+                    'service_name': endpoint['ServiceName'],
+                    'vpc_id': endpoint['VpcId']
+                })
         
         return endpoints
-    except Exception as e:
-        logger.error(f"Error getting VPC Endpoints in {region}: {str(e)}")
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting VPC Endpoints in {region}: {str(e)}")
         return []
 
-def send_email_report(charged_resources):
+def send_email_report(charged_resources, region_service_index=None, report_json=None, now=None):
     """
-    Send email report using Amazon SES
+    Send email report using Amazon SES.
+    report_json is charged_resources already serialized with dumps_report_json, if available.
+    now is the invocation time (UTC) used in the subject.
     """
     try:
-        if not RECIPIENT_EMAILS or not RECIPIENT_EMAILS[0]:
+        recipients = [recipient.strip() for recipient in RECIPIENT_EMAILS if recipient.strip()]
+        if not recipients:
             logger.warning("No recipient emails configured")
             return False
         
-        ses_client = boto3.client('ses', region_name=AWS_REGION_SES)
-        
         # Generate email content
-        subject = f"AWS Detailed Cost Report - {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}"
-        html_body = generate_html_email_body(charged_resources)
-        text_body = generate_text_email_body(charged_resources)
+        subject = f"AWS Detailed Cost Report - {(now or datetime.now(timezone.utc)).strftime('%Y-%m-%d %H:%M UTC')}"
+        html_body = ''.join(generate_html_email_body(charged_resources, region_service_index))
+        text_body = generate_text_email_body(charged_resources, region_service_index)
+        
+        # Oversized reports go out as raw email with the full report attached
+        if len(html_body) > SES_MAX_INLINE_HTML:
+            logger.info("Report HTML is too large for a simple email, attaching the full report")
+            if report_json is None:
+                report_json = dumps_report_json(charged_resources)
+            attachment = gzip.compress(report_json.encode('utf-8'), compresslevel=1)
+            send_individual_emails(SES, recipients, subject, html_body, text_body, attachment)
+            return True
+        
+        # Every recipient gets the same message, so send it in bulk and fall back
+        # to individual sends for whatever the bulk call could not deliver
+        failed_recipients = send_bulk_email(SES, recipients, subject, html_body, text_body)
+        if failed_recipients:
+            send_individual_emails(SES, failed_recipients, subject, html_body, text_body)
         
-        # Send email to each recipient
-        for recipient in RECIPIENT_EMAILS:
-            recipient = recipient.strip()
-            if not recipient:
-                continue
-                
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error sending email: {str(e)}")
+        return False
+
+def send_bulk_email(ses_client, recipients, subject, html_body, text_body):
+    """
+    Send the report to all recipients with send_bulk_templated_email.
+    The SES template (SES_TEMPLATE_NAME) is managed in terraform.
+    Returns the recipients that still need to be sent individually.
+    """
+    template_data = json.dumps({'subject': subject, 'html': html_body, 'text': text_body})
+    if len(template_data) > SES_MAX_TEMPLATE_DATA:
+        logger.info("Report is too large for templated email, sending individually")
+        return recipients
+    
+    failed_recipients = []
+    sent = 0
+    try:
+        for i in range(0, len(recipients), SES_MAX_BULK_DESTINATIONS):
+            batch = recipients[i:i + SES_MAX_BULK_DESTINATIONS]
+            response = ses_client.send_bulk_templated_email(
+                Source=SENDER_EMAIL,
+                Template=SES_TEMPLATE_NAME,
+                DefaultTemplateData=template_data,
+                Destinations=[
+                    {'Destination': {'ToAddresses': [recipient]}}
+                    for recipient in batch
+                ]
+            )
+            
+            # Statuses come back in the same order as Destinations
+            for recipient, status in zip(batch, response['Status']):
+                if status['Status'] == 'Success':
+                    logger.info(f"Email sent successfully to {recipient}: {status['MessageId']}")
+                else:
+                    logger.warning(f"Bulk send to {recipient} failed: {status['Status']} {status.get('Error', '')}")
+                    failed_recipients.append(recipient)
+            sent = i + len(batch)
+        
+        return failed_recipients
+        
+    except ClientError as e:
+        # Earlier batches were already delivered; only the failed batch and the rest are resent
+        logger.warning(f"Bulk email send failed, sending individually: {str(e)}")
+        return failed_recipients + recipients[sent:]
+
+class RateLimiter:
+    """Token bucket allowing up to rate acquisitions per second across threads"""
+    
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+@lru_cache(maxsize=1)
+def get_max_send_rate():
+    """Get the account's SES send rate per second, cached for the container lifetime"""
+    try:
+        quota = SES.get_send_quota()
+        return max(1, int(quota['MaxSendRate']))
+    except ClientError as e:
+        # Fall back to the sandbox rate, which every account has at least
+        logger.warning(f"Could not get SES send quota, assuming 1 email per second: {str(e)}")
+        return 1
+
+def build_raw_email(recipient, subject, html_body, text_body, attachment):
+    """Build a MIME message with both bodies and the gzipped JSON report attached"""
+    message = MIMEMultipart('mixed')
+    message['Subject'] = subject
+    message['From'] = SENDER_EMAIL
+    message['To'] = recipient
+    
+    body = MIMEMultipart('alternative')
+    body.attach(MIMEText(text_body, 'plain', 'utf-8'))
+    body.attach(MIMEText(html_body, 'html', 'utf-8'))
+    message.attach(body)
+    
+    report = MIMEApplication(attachment, 'gzip')
+    report.add_header('Content-Disposition', 'attachment', filename='report.json.gz')
+    message.attach(report)
+    
+    return message.as_bytes()
+
+def send_individual_emails(ses_client, recipients, subject, html_body, text_body, attachment=None):
+    """
+    Send the report to each recipient concurrently.
+    Uses send_raw_email when there is an attachment, send_email otherwise.
+    """
+    max_send_rate = get_max_send_rate()
+    rate_limiter = RateLimiter(max_send_rate)
+    
+    def send_one(recipient):
+        # Throttling responses are retried with backoff by the client's adaptive retry mode
+        rate_limiter.acquire()
+        if attachment is not None:
+            response = ses_client.send_raw_email(
+                Source=SENDER_EMAIL,
+                Destinations=[recipient],
+                RawMessage={'Data': build_raw_email(recipient, subject, html_body, text_body, attachment)}
+            )
+        else:
             response = ses_client.send_email(
                 Source=SENDER_EMAIL,
                 Destination={'ToAddresses': [recipient]},
@@ -568,17 +948,104 @@ def send_email_report(charged_resources):
                     }
                 }
             )
-            logger.info(f"Email sent successfully to {recipient}: {response['MessageId']}")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error sending email: {str(e)}")
-        return False
+        logger.info(f"Email sent successfully to {recipient}: {response['MessageId']}")
+    
+    with ThreadPoolExecutor(max_workers=min(max_send_rate, len(recipients))) as executor:
+        # Consume the iterator so the first send failure is raised to the caller
+        list(executor.map(send_one, recipients))
+
+# Cost thresholds splitting amounts into COST_CLASSES; a cost equal to a threshold stays in the lower class
+COST_CLASSES = ('cost-low', 'cost-medium', 'cost-high')
+TOTAL_COST_THRESHOLDS = (10, 100)
+SERVICE_COST_THRESHOLDS = (5, 50)
+USAGE_COST_THRESHOLDS = (2, 20)
+
+# HTML report rows, formatted once per row with format_map
+SERVICE_ROW_TMPL = """
+            <tr class="service-header">
+                <td><strong>{service}</strong></td>
+                <td class="{cost_class}"><strong>${cost:.2f}</strong></td>
+                <td><strong>Service Total</strong></td>
+                <td><strong>{percentage:.1f}%</strong></td>
+            </tr>
+            """
+
+USAGE_ROW_TMPL = """
+                        <tr class="usage-type-row">
+                            <td class="indent">├─ {usage_type}</td>
+                            <td class="{cost_class}">${cost:.2f}</td>
+                            <td class="usage-details">{details}</td>
+                            <td>{percentage:.1f}% of service</td>
+                        </tr>
+                        """
+
+REGION_ROW_TMPL = '<tr class="region-header"><td colspan="6">{region} ({count} resources)</td></tr>'
+
+REGION_SERVICE_ROW_TMPL = '<tr class="service-header"><td></td><td colspan="5">{service} ({count} resources)</td></tr>'
+
+RESOURCE_ROW_TMPL = """
+                    <tr>
+                        <td></td>
+                        <td></td>
+                        <td>{resource_type}</td>
+                        <td>{resource_id}</td>
+                        <td>{state}</td>
+                        <td>{details}{more}</td>
+                    </tr>
+                    """
 
-def generate_html_email_body(charged_resources):
+# Plain text report separators
+SEP_EQ60 = '=' * 60
+SEP_DASH50 = '-' * 50
+SEP_EQ40 = '=' * 40
+
+# Plain text report header and summary, formatted once per report
+TEXT_HEADER_TMPL = """
+AWS DETAILED COST & RESOURCE REPORT
+Generated: {timestamp}
+Scan Period: Last 30 days
+
+TOTAL COST SUMMARY
+Total Cost (Current month): ${total_cost:.2f}
+
+DETAILED COST BREAKDOWN BY SERVICE & RESOURCE TYPE
+""" + SEP_EQ60 + "\n"
+
+TEXT_SUMMARY_TMPL = """
+
+SUMMARY
+""" + SEP_EQ40 + """
+Total Resources Found: {total_resources}
+Regions Scanned: {regions}
+Services with Charges: {services}
+Detailed Usage Types: {usage_types}
+
+This detailed report was generated automatically by AWS Lambda.
+For even more granular cost analysis, please check your AWS Cost Explorer dashboard.
+"""
+
+def cost_class(cost, thresholds):
+    """Pick the CSS class for a cost, e.g. (2, 20) gives low <= 2 < medium <= 20 < high"""
+    return COST_CLASSES[bisect_left(thresholds, cost)]
+
+def group_resources_by_service(resources):
+    """Group a region's resources by service, keeping discovery order"""
+    # Each collector returns one service's resources back to back, so groupby sees a few
+    # long runs and the dict is touched once per run instead of once per resource.
+    # The list is not sorted first, which would reorder services in the report
+    service_groups = {}
+    for service, run in groupby(resources, key=itemgetter('service')):
+        group = service_groups.get(service)
+        if group is None:
+            service_groups[service] = list(run)
+        else:
+            group.extend(run)
+    return service_groups
+
+def generate_html_email_body(charged_resources, region_service_index=None):
     """
-    Generate HTML email body with detailed cost breakdown
+    Generate HTML email body with detailed cost breakdown, yielding it in chunks.
+    region_service_index maps each region to its resources grouped by service.
     """
     total_cost = charged_resources.get('total_cost', 0)
     timestamp = charged_resources.get('timestamp', '')
@@ -587,7 +1054,13 @@ def generate_html_email_body(charged_resources):
     resources_by_region = charged_resources.get('resources_by_region', {})
     detailed_resources = charged_resources.get('detailed_resources', [])
     
-    html = f"""
+    if region_service_index is None:
+        region_service_index = {
+            region: group_resources_by_service(resources)
+            for region, resources in resources_by_region.items()
+        }
+    
+    yield f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -618,16 +1091,18 @@ def generate_html_email_body(charged_resources):
         <div class="cost-summary">
             <h2>💰 Total Cost Summary</h2>
             <p><strong>Total Cost (Current month):</strong> 
-                <span class="{'cost-high' if total_cost > 100 else 'cost-medium' if total_cost > 10 else 'cost-low'}">
+                <span class="{cost_class(total_cost, TOTAL_COST_THRESHOLDS)}">
                     ${total_cost:.2f}
                 </span>
             </p>
         </div>
     """
     
-    # Detailed Cost Breakdown by Service and Usage Type
+    # Detailed Cost Breakdown by Service and Usage Type, counting usage types for the summary
+    # the same way as the text body
+    total_usage_types = 0
     if detailed_breakdown:
-        html += """
+        yield """
         <h2>📊 Detailed Cost Breakdown by Service & Resource Type</h2>
         <table>
             <tr>
@@ -638,73 +1113,71 @@ def generate_html_email_body(charged_resources):
             </tr>
         """
         
-        sorted_services = sorted(resources_by_service.items(), key=lambda x: x[1], reverse=True)
+        # Percentages multiply by a reciprocal computed once per denominator
+        total_scale = (100.0 / total_cost) if total_cost > 0 else 0.0
+        sorted_services = sorted(resources_by_service.items(), key=itemgetter(1), reverse=True)
         for service, service_cost in sorted_services:
-            service_percentage = (service_cost / total_cost * 100) if total_cost > 0 else 0
-            service_cost_class = 'cost-high' if service_cost > 50 else 'cost-medium' if service_cost > 5 else 'cost-low'
+            service_percentage = service_cost * total_scale
             
-            html += f"""
-            <tr class="service-header">
-                <td><strong>{service}</strong></td>
-                <td class="{service_cost_class}"><strong>${service_cost:.2f}</strong></td>
-                <td><strong>Service Total</strong></td>
-                <td><strong>{service_percentage:.1f}%</strong></td>
-            </tr>
-            """
+            yield SERVICE_ROW_TMPL.format_map({
+                'service': service,
+                'cost_class': cost_class(service_cost, SERVICE_COST_THRESHOLDS),
+                'cost': service_cost,
+                'percentage': service_percentage
+            })
             
              # Add detailed breakdown for this service WITH USAGE DATA
             if service in detailed_breakdown:
-                usage_items = sorted(detailed_breakdown[service].items(), key=lambda x: x[1]['cost'], reverse=True)
-                for usage_type, usage_data in usage_items:
-                    usage_cost = usage_data['cost']
-                    if usage_cost > 0.01:  # Only show costs > $0.01
-                        usage_percentage = (usage_cost / service_cost * 100) if service_cost > 0 else 0
-                        usage_cost_class = 'cost-high' if usage_cost > 20 else 'cost-medium' if usage_cost > 2 else 'cost-low'
-                        
-                        # Format usage details
-                        usage_quantity = usage_data['usage_quantity']
-                        rate_per_unit = usage_data['rate_per_unit']
-                        usage_type_raw = usage_data['usage_type_raw']
-                        unit = get_usage_unit_for_type(usage_type_raw, service)
-                        
-                        # Create usage details string
-                        usage_details = ""
-                        if usage_quantity > 0 and rate_per_unit > 0:
-                            if usage_quantity >= 1000:
-                                formatted_quantity = f"{usage_quantity:,.0f}"
-                            elif usage_quantity >= 1:
-                                formatted_quantity = f"{usage_quantity:.1f}"
-                            else:
-                                formatted_quantity = f"{usage_quantity:.3f}"
-                            
-                            usage_details = f"${rate_per_unit:.3f} per {unit} × {formatted_quantity} {unit}"
+                total_usage_types += len(detailed_breakdown[service])
+                # Drop sub-cent rows before sorting, then sort on the cost decorated in once
+                usage_items = [
+                    (usage_type, usage_data['cost'], usage_data)
+                    for usage_type, usage_data in detailed_breakdown[service].items()
+                    if usage_data['cost'] > 0.01  # Only show costs > $0.01
+                ]
+                usage_items.sort(key=itemgetter(1), reverse=True)
+                service_scale = (100.0 / service_cost) if service_cost > 0 else 0.0
+                for usage_type, usage_cost, usage_data in usage_items:
+                    usage_percentage = usage_cost * service_scale
+                    
+                    # Format usage details
+                    usage_quantity = usage_data['usage_quantity']
+                    rate_per_unit = usage_data['rate_per_unit']
+                    usage_type_raw = usage_data['usage_type_raw']
+                    unit = get_usage_unit_for_type(usage_type_raw, service)
+                    
+                    # Create usage details string
+                    usage_details = ""
+                    if usage_quantity > 0 and rate_per_unit > 0:
+                        if usage_quantity >= 1000:
+                            formatted_quantity = f"{usage_quantity:,.0f}"
+                        elif usage_quantity >= 1:
+                            formatted_quantity = f"{usage_quantity:.1f}"
+                        else:
+                            formatted_quantity = f"{usage_quantity:.3f}"
                         
-                        html += f"""
-                        <tr class="usage-type-row">
-                            <td class="indent">├─ {usage_type}</td>
-                            <td class="{usage_cost_class}">${usage_cost:.2f}</td>
-                            <td class="usage-details">{usage_details}</td>
-                            <td>{usage_percentage:.1f}% of service</td>
-                        </tr>
-                        """
-        html += "</table>"
+                        usage_details = f"${rate_per_unit:.3f} per {unit} × {formatted_quantity} {unit}"
+                    
+                    yield USAGE_ROW_TMPL.format_map({
+                        'usage_type': usage_type,
+                        'cost_class': cost_class(usage_cost, USAGE_COST_THRESHOLDS),
+                        'cost': usage_cost,
+                        'details': usage_details,
+                        'percentage': usage_percentage
+                    })
+        yield "</table>"
     
     # Resources by Region (existing code remains the same)
     if resources_by_region:
-        html += "<h2>🌍 Resources by Region</h2><table>"
-        html += "<tr><th>Region</th><th>Service</th><th>Resource Type</th><th>Resource ID</th><th>State</th><th>Details</th></tr>"
+        yield "<h2>🌍 Resources by Region</h2><table>"
+        yield "<tr><th>Region</th><th>Service</th><th>Resource Type</th><th>Resource ID</th><th>State</th><th>Details</th></tr>"
         
         for region, resources in resources_by_region.items():
             region_resource_count = len(resources)
-            html += f'<tr class="region-header"><td colspan="6">{region.upper()} ({region_resource_count} resources)</td></tr>'
-            
-            # Group by service
-            service_groups = defaultdict(list)
-            for resource in resources:
-                service_groups[resource['service']].append(resource)
+            yield REGION_ROW_TMPL.format(region=region.upper(), count=region_resource_count)
             
-            for service, service_resources in service_groups.items():
-                html += f'<tr class="service-header"><td></td><td colspan="5">{service} ({len(service_resources)} resources)</td></tr>'
+            for service, service_resources in region_service_index[region].items():
+                yield REGION_SERVICE_ROW_TMPL.format(service=service, count=len(service_resources))
                 
                 for resource in service_resources:
                     details = []
@@ -712,28 +1185,25 @@ def generate_html_email_body(charged_resources):
                         if key not in ['service', 'resource_type', 'resource_id', 'region', 'state']:
                             details.append(f"{key}: {value}")
                     
-                    html += f"""
-                    <tr>
-                        <td></td>
-                        <td></td>
-                        <td>{resource.get('resource_type', 'N/A')}</td>
-                        <td>{resource.get('resource_id', 'N/A')}</td>
-                        <td>{resource.get('state', 'N/A')}</td>
-                        <td>{', '.join(details[:3])}{'...' if len(details) > 3 else ''}</td>
-                    </tr>
-                    """
-        html += "</table>"
+                    yield RESOURCE_ROW_TMPL.format_map({
+                        'resource_type': resource.get('resource_type', 'N/A'),
+                        'resource_id': resource.get('resource_id', 'N/A'),
+                        'state': resource.get('state', 'N/A'),
+                        'details': ', '.join(details[:3]),
+                        'more': '...' if len(details) > 3 else ''
+                    })
+        yield "</table>"
     
     # Summary
     total_resources = len(detailed_resources)
-    html += f"""
+    yield f"""
         <div class="cost-summary">
             <h2>📈 Summary</h2>
             <ul>
                 <li><strong>Total Resources Found:</strong> {total_resources}</li>
                 <li><strong>Regions Scanned:</strong> {len(resources_by_region)}</li>
                 <li><strong>Services with Charges:</strong> {len(resources_by_service)}</li>
-                <li><strong>Detailed Usage Types:</strong> {sum(len(breakdown) for breakdown in detailed_breakdown.values())}</li>
+                <li><strong>Detailed Usage Types:</strong> {total_usage_types}</li>
             </ul>
         </div>
         
@@ -743,12 +1213,11 @@ def generate_html_email_body(charged_resources):
     </body>
     </html>
     """
-    
-    return html
 
-def generate_text_email_body(charged_resources):
+def generate_text_email_body(charged_resources, region_service_index=None):
     """
-    Generate plain text email body with detailed breakdown
+    Generate plain text email body with detailed breakdown.
+    region_service_index maps each region to its resources grouped by service.
     """
     total_cost = charged_resources.get('total_cost', 0)
     timestamp = charged_resources.get('timestamp', '')
@@ -757,107 +1226,110 @@ def generate_text_email_body(charged_resources):
     resources_by_region = charged_resources.get('resources_by_region', {})
     detailed_resources = charged_resources.get('detailed_resources', [])
     
-    text = f"""
-AWS DETAILED COST & RESOURCE REPORT
-Generated: {timestamp}
-Scan Period: Last 30 days
-
-TOTAL COST SUMMARY
-Total Cost (Current month): ${total_cost:.2f}
-
-DETAILED COST BREAKDOWN BY SERVICE & RESOURCE TYPE
-{'=' * 60}
-"""
+    if region_service_index is None:
+        region_service_index = {
+            region: group_resources_by_service(resources)
+            for region, resources in resources_by_region.items()
+        }
+    
+    buf = io.StringIO()
+    write = buf.write
     
-    # Detailed Cost Breakdown
+    write(TEXT_HEADER_TMPL.format(timestamp=timestamp, total_cost=total_cost))
+    
+    # Detailed Cost Breakdown, counting usage types for the summary as they are walked
+    total_usage_types = 0
     if detailed_breakdown:
-        sorted_services = sorted(resources_by_service.items(), key=lambda x: x[1], reverse=True)
+        detailed_breakdown_get = detailed_breakdown.get
+        # Percentages multiply by a reciprocal computed once per denominator
+        total_scale = (100.0 / total_cost) if total_cost > 0 else 0.0
+        sorted_services = sorted(resources_by_service.items(), key=itemgetter(1), reverse=True)
         for service, service_cost in sorted_services:
-            service_percentage = (service_cost / total_cost * 100) if total_cost > 0 else 0
-            text += f"\n{service}: ${service_cost:.2f} ({service_percentage:.1f}%)\n"
-            text += "-" * 50 + "\n"
+            service_percentage = service_cost * total_scale
+            write(f"\n{service}: ${service_cost:.2f} ({service_percentage:.1f}%)\n")
+            write(SEP_DASH50)
+            write("\n")
             
-            if service in detailed_breakdown:
-                usage_types = sorted(detailed_breakdown[service].items(), key=lambda x: x[1]['cost'], reverse=True)
-                for usage_type, usage_data in usage_types:
-                    usage_cost = usage_data['cost']
-                    if usage_cost > 0.01:
-                        usage_percentage = (usage_cost / service_cost * 100) if service_cost > 0 else 0
-                        text += f"  ├─ {usage_type}: ${usage_cost:.2f} ({usage_percentage:.1f}% of service)\n"
-            text += "\n"
+            usage_breakdown = detailed_breakdown_get(service)
+            if usage_breakdown is not None:
+                total_usage_types += len(usage_breakdown)
+                usage_types = [
+                    (usage_type, usage_data['cost'])
+                    for usage_type, usage_data in usage_breakdown.items()
+                    if usage_data['cost'] > 0.01
+                ]
+                usage_types.sort(key=itemgetter(1), reverse=True)
+                service_scale = (100.0 / service_cost) if service_cost > 0 else 0.0
+                for usage_type, usage_cost in usage_types:
+                    usage_percentage = usage_cost * service_scale
+                    write(f"  ├─ {usage_type}: ${usage_cost:.2f} ({usage_percentage:.1f}% of service)\n")
+            write("\n")
     
     # Resources by Region (simplified for text)
     if resources_by_region:
-        text += "RESOURCES BY REGION\n"
-        text += "=" * 40 + "\n"
+        write("RESOURCES BY REGION\n")
+        write(SEP_EQ40)
+        write("\n")
         
         for region, resources in resources_by_region.items():
-            text += f"\n{region.upper()} ({len(resources)} resources)\n"
-            
-            # Group by service
-            service_groups = defaultdict(list)
-            for resource in resources:
-                service_groups[resource['service']].append(resource)
+            write(f"\n{region.upper()} ({len(resources)} resources)\n")
             
-            for service, service_resources in service_groups.items():
-                text += f"  {service}: {len(service_resources)} resources\n"
-                for resource in service_resources[:3]:  # Limit to first 3 per service
-                    text += f"    - {resource.get('resource_type', 'N/A')}: {resource.get('resource_id', 'N/A')} ({resource.get('state', 'N/A')})\n"
-                if len(service_resources) > 3:
-                    text += f"    ... and {len(service_resources) - 3} more\n"
+            for service, service_resources in region_service_index[region].items():
+                resource_count = len(service_resources)
+                write(f"  {service}: {resource_count} resources\n")
+                for resource in islice(service_resources, 3):  # Limit to first 3 per service
+                    write(f"    - {resource.get('resource_type', 'N/A')}: {resource.get('resource_id', 'N/A')} ({resource.get('state', 'N/A')})\n")
+                if resource_count > 3:
+                    write(f"    ... and {resource_count - 3} more\n")
     
     # Summary
     total_resources = len(detailed_resources)
-    text += f"""
-
-SUMMARY
-{'=' * 40}
-Total Resources Found: {total_resources}
-Regions Scanned: {len(resources_by_region)}
-Services with Charges: {len(resources_by_service)}
-Detailed Usage Types: {sum(len(breakdown) for breakdown in detailed_breakdown.values())}
-
-This detailed report was generated automatically by AWS Lambda.
-For even more granular cost analysis, please check your AWS Cost Explorer dashboard.
-"""
+    write(TEXT_SUMMARY_TMPL.format(
+        total_resources=total_resources,
+        regions=len(resources_by_region),
+        services=len(resources_by_service),
+        usage_types=total_usage_types
+    ))
     
-    return text
+    return buf.getvalue()
 
 # Keep all the existing resource gathering functions unchanged
 def get_ec2_instances(region):
     """Get running EC2 instances"""
     try:
-        ec2 = boto3.client('ec2', region_name=region)
-        response = ec2.describe_instances(
-            Filters=[{'Name': 'instance-state-name', 'Values': ['running', 'stopped']}]
-        )
+        ec2 = _client('ec2', region)
+        paginator = ec2.get_paginator('describe_instances')
         
         instances = []
-        for reservation in response['Reservations']:
-            for instance in reservation['Instances']:
-                instances.append({
-                    'service': 'EC2',
-                    'resource_type': 'Instance',
-                    'resource_id': instance['InstanceId'],
-                    'region': region,
-                    'state': instance['State']['Name'],
-                    'instance_type': instance['InstanceType'],
-                    'launch_time': instance['LaunchTime']
-                })
+        for page in paginator.paginate(
+            Filters=[{'Name': 'instance-state-name', 'Values': ['running', 'stopped']}]
+        ):
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    instances.append({
+                        'service': 'EC2',
+                        'resource_type': 'Instance',
+                        'resource_id': instance['InstanceId'],
+                        'region': region,
+                        'state': instance['State']['Name'],
+                        'instance_type': instance['InstanceType'],
+                        'launch_time': instance['LaunchTime']
+                    })
         
         return instances
-    except Exception as e:
-        logger.error(f"Error getting EC2 instances in {region}: {str(e)}")
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting EC2 instances in {region}: {str(e)}")
         return []
 
-def get_rds_instances(region):
-    """Get RDS instances"""
-    try:
-        rds = boto3.client('rds', region_name=region)
-        response = rds.describe_db_instances()
-        
-        instances = []
-        for db in response['DBInstances']:
+def list_rds_instances(region):
+    """List RDS instances in a region"""
+    rds = _client('rds', region)
+    paginator = rds.get_paginator('describe_db_instances')
+    
+    instances = []
+    for page in paginator.paginate():
+        for db in page['DBInstances']:
             instances.append({
                 'service': 'RDS',
                 'resource_type': 'DB Instance',
@@ -867,33 +1339,42 @@ def get_rds_instances(region):
                 'instance_class': db['DBInstanceClass'],
                 'engine': db['Engine']
             })
-        
-        return instances
-    except Exception as e:
-        logger.error(f"Error getting RDS instances in {region}: {str(e)}")
+    
+    return instances
+
+def get_rds_instances(region):
+    """Get RDS instances"""
+    try:
+        # RDS topology rarely changes within a day
+        return cached(('rds_instances', region), 900, lambda: list_rds_instances(region))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting RDS instances in {region}: {str(e)}")
         return []
 
 def get_ebs_volumes(region):
     """Get EBS volumes"""
     try:
-        ec2 = boto3.client('ec2', region_name=region)
-        response = ec2.describe_volumes()
+        ec2 = _client('ec2', region)
+        paginator = ec2.get_paginator('describe_volumes')
         
         volumes = []
-        for volume in response['Volumes']:
-            volumes.append({
-                'service': 'EBS',
-                'resource_type': 'Volume',
-                'resource_id': volume['VolumeId'],
-                'region': region,
-                'state': volume['State'],
-                'size_gb': volume['Size'],
-                'volume_type': volume['VolumeType']
-            })
+        for page in paginator.paginate():
+            for volume in page['Volumes']:
+                volumes.append({
+                    'service': 'EBS',
+                    'resource_type': 'Volume',
+                    'resource_id': volume['VolumeId'],
+                    'region': region,
+                    'state': volume['State'],
+                    'size_gb': volume['Size'],
+                    'volume_type': volume['VolumeType']
+                })
         
         return volumes
-    except Exception as e:
-        logger.error(f"Error getting EBS volumes in {region}: {str(e)}")
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting EBS volumes in {region}: {str(e)}")
         return []
 
 def get_load_balancers(region):
@@ -902,36 +1383,45 @@ def get_load_balancers(region):
     
     try:
         # Application and Network Load Balancers
-        elbv2 = boto3.client('elbv2', region_name=region)
-        response = elbv2.describe_load_balancers()
+        elbv2 = _client('elbv2', region)
+        paginator = elbv2.get_paginator('describe_load_balancers')
         
-        for lb in response['LoadBalancers']:
-            resources.append({
-                'service': 'ELB',
-                'resource_type': 'Load Balancer',
-                'resource_id': lb['LoadBalancerName'],
-                'region': region,
-                'state': lb['State']['Code'],
-                'type': lb['Type'],
-                'scheme': lb['Scheme']
-            })
-    except Exception as e:
+        for page in paginator.paginate():
+            for lb in page['LoadBalancers']:
+                resources.append({
+                    'service': 'ELB',
+                    'resource_type': 'Load Balancer',
+                    'resource_id': lb['LoadBalancerName'],
+                    'region': region,
+                    'state': lb['State']['Code'],
+                    'type': lb['Type'],
+                    'scheme': lb['Scheme']
+                })
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting ALB/NLB in {region}: {str(e)}")
+    except BotoCoreError as e:
+        # Keep the two listings independent, e.g. on an EndpointConnectionError
         logger.error(f"Error getting ALB/NLB in {region}: {str(e)}")
     
     try:
         # Classic Load Balancers
-        elb = boto3.client('elb', region_name=region)
-        response = elb.describe_load_balancers()
+        elb = _client('elb', region)
+        paginator = elb.get_paginator('describe_load_balancers')
         
-        for lb in response['LoadBalancerDescriptions']:
-            resources.append({
-                'service': 'ELB',
-                'resource_type': 'Classic Load Balancer',
-                'resource_id': lb['LoadBalancerName'],
-                'region': region,
-                'scheme': lb['Scheme']
-            })
-    except Exception as e:
+        for page in paginator.paginate():
+            for lb in page['LoadBalancerDescriptions']:
+                resources.append({
+                    'service': 'ELB',
+                    'resource_type': 'Classic Load Balancer',
+                    'resource_id': lb['LoadBalancerName'],
+                    'region': region,
+                    'scheme': lb['Scheme']
+                })
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting Classic ELB in {region}: {str(e)}")
+    except BotoCoreError as e:
         logger.error(f"Error getting Classic ELB in {region}: {str(e)}")
     
     return resources
@@ -939,149 +1429,197 @@ def get_load_balancers(region):
 def get_nat_gateways(region):
     """Get NAT Gateways"""
     try:
-        ec2 = boto3.client('ec2', region_name=region)
-        response = ec2.describe_nat_gateways()
+        ec2 = _client('ec2', region)
+        paginator = ec2.get_paginator('describe_nat_gateways')
         
         gateways = []
-        for nat in response['NatGateways']:
-            if nat['State'] in ['available', 'pending']:
-                gateways.append({
-                    'service': 'VPC',
-                    'resource_type': 'NAT Gateway',
-                    'resource_id': nat['NatGatewayId'],
-                    'region': region,
-                    'state': nat['State'],
-                    'subnet_id': nat['SubnetId']
-                })
+        for page in paginator.paginate():
+            for nat in page['NatGateways']:
+                if nat['State'] in ['available', 'pending']:
+                    gateways.append({
+                        'service': 'VPC',
+                        'resource_type': 'NAT Gateway',
+                        'resource_id': nat['NatGatewayId'],
+                        'region': region,
+                        'state': nat['State'],
+                        'subnet_id': nat['SubnetId']
+                    })
         
         return gateways
-    except Exception as e:
-        logger.error(f"Error getting NAT Gateways in {region}: {str(e)}")
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting NAT Gateways in {region}: {str(e)}")
         return []
 
 def get_elasticache_clusters(region):
     """Get ElastiCache clusters"""
     try:
-        elasticache = boto3.client('elasticache', region_name=region)
-        response = elasticache.describe_cache_clusters()
+        elasticache = _client('elasticache', region)
+        paginator = elasticache.get_paginator('describe_cache_clusters')
         
         clusters = []
-        for cluster in response['CacheClusters']:
-            clusters.append({
-                'service': 'ElastiCache',
-                'resource_type': 'Cache Cluster',
-                'resource_id': cluster['CacheClusterId'],
-                'region': region,
-                'state': cluster['CacheClusterStatus'],
-                'node_type': cluster['CacheNodeType'],
-                'engine': cluster['Engine']
-            })
+        for page in paginator.paginate():
+            for cluster in page['CacheClusters']:
+                clusters.append({
+                    'service': 'ElastiCache',
+                    'resource_type': 'Cache Cluster',
+                    'resource_id': cluster['CacheClusterId'],
+                    'region': region,
+                    'state': cluster['CacheClusterStatus'],
+                    'node_type': cluster['CacheNodeType'],
+                    'engine': cluster['Engine']
+                })
         
         return clusters
-    except Exception as e:
-        logger.error(f"Error getting ElastiCache clusters in {region}: {str(e)}")
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting ElastiCache clusters in {region}: {str(e)}")
         return []
 
 def get_redshift_clusters(region):
     """Get Redshift clusters"""
     try:
-        redshift = boto3.client('redshift', region_name=region)
-        response = redshift.describe_clusters()
+        redshift = _client('redshift', region)
+        paginator = redshift.get_paginator('describe_clusters')
         
         clusters = []
-        for cluster in response['Clusters']:
-            clusters.append({
-                'service': 'Redshift',
-                'resource_type': 'Cluster',
-                'resource_id': cluster['ClusterIdentifier'],
-                'region': region,
-                'state': cluster['ClusterStatus'],
-                'node_type': cluster['NodeType'],
-                'number_of_nodes': cluster['NumberOfNodes']
-            })
+        for page in paginator.paginate():
+            for cluster in page['Clusters']:
+                clusters.append({
+                    'service': 'Redshift',
+                    'resource_type': 'Cluster',
+                    'resource_id': cluster['ClusterIdentifier'],
+                    'region': region,
+                    'state': cluster['ClusterStatus'],
+                    'node_type': cluster['NodeType'],
+                    'number_of_nodes': cluster['NumberOfNodes']
+                })
         
         return clusters
-    except Exception as e:
-        logger.error(f"Error getting Redshift clusters in {region}: {str(e)}")
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting Redshift clusters in {region}: {str(e)}")
         return []
 
 def get_lambda_functions(region):
     """Get Lambda functions (only if they have recent invocations)"""
     try:
-        lambda_client = boto3.client('lambda', region_name=region)
-        response = lambda_client.list_functions()
+        lambda_client = _client('lambda', region)
+        paginator = lambda_client.get_paginator('list_functions')
         
         functions = []
-        for func in response['Functions']:
-            # Only include functions that might be generating charges
-            functions.append({
-                'service': 'Lambda',
-                'resource_type': 'Function',
-                'resource_id': func['FunctionName'],
-                'region': region,
-                'runtime': func['Runtime'],
-                'memory_size': func['MemorySize'],
-                'last_modified': func['LastModified']
-            })
+        for page in paginator.paginate():
+            for func in page['Functions']:
+                # Only include functions that might be generating charges
+                functions.append({
+                    'service': 'Lambda',
+                    'resource_type': 'Function',
+                    'resource_id': func['FunctionName'],
+                    'region': region,
+                    'runtime': func['Runtime'],
+                    'memory_size': func['MemorySize'],
+                    'last_modified': func['LastModified']
+                })
         
         return functions
-    except Exception as e:
-        logger.error(f"Error getting Lambda functions in {region}: {str(e)}")
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_REGION_ERROR_CODES:
+            logger.error(f"Error getting Lambda functions in {region}: {str(e)}")
         return []
 
+def list_cloudfront_distributions():
+    """List CloudFront distributions"""
+    cloudfront = _client('cloudfront')
+    paginator = cloudfront.get_paginator('list_distributions')
+    
+    resources = []
+    for page in paginator.paginate():
+        for dist in page.get('DistributionList', {}).get('Items', []):
+            resources.append({
+                'service': 'CloudFront',
+                'resource_type': 'Distribution',
+                'resource_id': dist['Id'],
+                'region': 'global',
+                'state': dist['Status'],
+                'domain_name': dist['DomainName']
+            })
+    
+    return resources
+
+def list_route53_hosted_zones():
+    """List Route 53 hosted zones"""
+    route53 = _client('route53')
+    paginator = route53.get_paginator('list_hosted_zones')
+    
+    resources = []
+    for page in paginator.paginate():
+        for zone in page['HostedZones']:
+            resources.append({
+                'service': 'Route53',
+                'resource_type': 'Hosted Zone',
+                'resource_id': zone['Id'],
+                'region': 'global',
+                'name': zone['Name'],
+                'record_count': zone['ResourceRecordSetCount']
+            })
+    
+    return resources
+
+def list_waf_web_acls(scope):
+    """List WAFv2 web ACLs for one scope (REGIONAL or CLOUDFRONT)"""
+    waf = _client('wafv2', 'us-east-1')  # WAFv2 is global but accessed via us-east-1
+    
+    resources = []
+    # wafv2 has no paginators, follow NextMarker by hand
+    kwargs = {'Scope': scope}
+    while True:
+        response = waf.list_web_acls(**kwargs)
+        for acl in response['WebACLs']:
+            resources.append({
+                'service': 'WAF',
+                'resource_type': 'Web ACL',
+                'resource_id': acl['Name'],
+                'region': 'global',
+                'state': 'active',
+                'arn': acl['ARN'],
+                'scope': scope
+            })
+        if not response.get('NextMarker'):
+            break
+        kwargs['NextMarker'] = response['NextMarker']
+    
+    return resources
+
 def get_global_charged_resources(charged_services):
     """Get global resources that might be charged"""
     resources = []
     
+    # One pass over the service names, then each check is a single substring search
+    joined_services = ' | '.join(charged_services)
+    
     try:
+        # These change on human timescales, so warm invocations reuse the last listing
         # CloudFront distributions
-        if any('CloudFront' in service for service in charged_services):
-            cloudfront = boto3.client('cloudfront')
-            response = cloudfront.list_distributions()
-            
-            if 'DistributionList' in response and 'Items' in response['DistributionList']:
-                for dist in response['DistributionList']['Items']:
-                    resources.append({
-                        'service': 'CloudFront',
-                        'resource_type': 'Distribution',
-                        'resource_id': dist['Id'],
-                        'region': 'global',
-                        'state': dist['Status'],
-                        'domain_name': dist['DomainName']
-                    })
+        if 'CloudFront' in joined_services:
+            resources.extend(cached('cloudfront_distributions', 900, list_cloudfront_distributions))
         
         # Route 53 hosted zones
-        if any('Route 53' in service for service in charged_services):
-            route53 = boto3.client('route53')
-            response = route53.list_hosted_zones()
-            
-            for zone in response['HostedZones']:
-                resources.append({
-                    'service': 'Route53',
-                    'resource_type': 'Hosted Zone',
-                    'resource_id': zone['Id'],
-                    'region': 'global',
-                    'name': zone['Name'],
-                    'record_count': zone['ResourceRecordSetCount']
-                })
+        if 'Route 53' in joined_services:
+            resources.extend(cached('route53_hosted_zones', 3600, list_route53_hosted_zones))
         
         # WAF Web ACLs
-        if any('WAF' in service for service in charged_services):
-            try:
-                waf = boto3.client('wafv2', region_name='us-east-1')  # WAFv2 is global but accessed via us-east-1
-                response = waf.list_web_acls(Scope='REGIONAL')
-                
-                for acl in response['WebACLs']:
-                    resources.append({
-                        'service': 'WAF',
-                        'resource_type': 'Web ACL',
-                        'resource_id': acl['Name'],
-                        'region': 'global',
-                        'state': 'active',
-                        'arn': acl['ARN']
-                    })
-            except Exception as e:
-                logger.error(f"Error getting WAF resources: {str(e)}")
+        if 'WAF' in joined_services:
+            # CloudFront-attached ACLs only show up under the CLOUDFRONT scope, so list both at once
+            with ThreadPoolExecutor(max_workers=len(WAF_SCOPES)) as executor:
+                futures = [
+                    executor.submit(cached, ('waf_web_acls', scope), 900, lambda scope=scope: list_waf_web_acls(scope))
+                    for scope in WAF_SCOPES
+                ]
+                for future in futures:
+                    try:
+                        resources.extend(future.result())
+                    except Exception as e:
+                        logger.error(f"Error getting WAF resources: {str(e)}")
     
     except Exception as e:
         logger.error(f"Error getting global resources: {str(e)}")
@@ -104,8 +104,11 @@ resource "aws_iam_policy" "lambda_policy" {
         "lambda:ListFunctions",
         "cloudfront:ListDistributions",
         "route53:ListHostedZones",
+        "wafv2:ListWebACLs",
         "ses:SendEmail",
         "ses:SendRawEmail",
+        "ses:SendBulkTemplatedEmail",
+        "ses:GetSendQuota",
         "s3:DeleteObject",
         "s3:GetObject",
         "s3:PutObject"
@@ -133,6 +136,15 @@ resource "aws_cloudwatch_log_group" "lambda_logs" {
   tags = local.common_tags
 }
 
+# SES template for the bulk report email; the Lambda fills in the pre-rendered parts
+# (triple braces so SES does not HTML-escape them)
+resource "aws_ses_template" "report" {
+  name    = "${var.project_name}-report-${var.environment}"
+  subject = "{{{subject}}}"
+  html    = "{{{html}}}"
+  text    = "{{{text}}}"
+}
+
 # Lambda Function
 resource "aws_lambda_function" "cost_reporter" {
   filename         = data.archive_file.lambda_zip.output_path
@@ -150,6 +162,7 @@ resource "aws_lambda_function" "cost_reporter" {
       SENDER_EMAIL      = var.sender_email
       RECIPIENT_EMAILS  = join(",", var.recipient_emails)
       AWS_REGION_SES    = var.aws_region
+      SES_TEMPLATE_NAME = aws_ses_template.report.name
       ENVIRONMENT       = var.environment
     }
   }